@@ -0,0 +1,101 @@
+"""Append-only journal of per-module results for resumable runs"""
+
+
+import hashlib
+import json
+import logging
+import os
+
+from PyGenii import stats
+
+
+class Journal:
+    """Record completed modules so an interrupted scan can be resumed"""
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.entries = {}
+
+    @staticmethod
+    def digest(source):
+        """Return the SHA-1 digest of a module contents"""
+        return hashlib.sha1(source).hexdigest()
+        
+    @staticmethod
+    def file_digest(module_name):
+        """Return the SHA-1 digest of a module read from disk"""
+        with open(module_name, 'rb') as module_file:
+            return Journal.digest(module_file.read())
+
+    def clear(self):
+        """Start a new, empty journal"""
+        self.entries = {}
+        open(self.file_name, 'w').close()
+
+    def load(self):
+        """Read back every complete record written by a previous run"""
+        self.entries = {}
+        if not os.path.isfile(self.file_name):
+            logging.info("No checkpoint found at %s", self.file_name)
+            return
+        complete_size = 0
+        with open(self.file_name, 'rb') as journal_file:
+            for line_number, line in enumerate(journal_file, 1):
+                if not line.endswith(b'\n'):
+                    # A killed process may leave a truncated last line
+                    logging.warning("Dropping partial checkpoint line %d", 
+                        line_number)
+                    break
+                complete_size = complete_size + len(line)
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    logging.warning("Ignoring corrupt checkpoint line %d", 
+                        line_number)
+                    continue
+                self.entries[record['module']] = record
+        # Cut the partial line, so the next record starts on a fresh one
+        if complete_size < os.path.getsize(self.file_name):
+            os.truncate(self.file_name, complete_size)
+        logging.info("Loaded %d checkpoint records", len(self.entries))
+
+    def lookup(self, module_name, exception_settings):
+        """Return stored stats per exception setting, or None
+        
+        The module must be unchanged and recorded for every setting. Its
+        contents are only hashed when the modification time differs.
+        """
+        record = self.entries.get(module_name)
+        if record is None:
+            return None
+        stored = dict((use_exceptions, data) 
+            for use_exceptions, data in record['stats'])
+        if not all(use_exceptions in stored 
+                for use_exceptions in exception_settings):
+            return None
+        if os.path.getmtime(module_name) != record['mtime']:
+            # Touched but maybe not modified: fall back to content check
+            if self.file_digest(module_name) != record['digest']:
+                logging.info("Module %s changed since checkpoint", 
+                    module_name)
+                return None
+        if record.get('error'):
+            logging.info("Module %s failed in a previous run: %s", 
+                module_name, record['error'])
+        return dict((use_exceptions, stats.Stats.from_dict(
+            stored[use_exceptions])) for use_exceptions in exception_settings)
+
+    def record(self, module_name, mtime, digest, variant_stats, error=None):
+        """Append the results of a completed or failed module to the journal
+        
+        A module that failed to parse is recorded with its error and empty
+        stats, so resumed runs skip it until its contents change.
+        """
+        record = {'module': module_name, 
+            'mtime': mtime,
+            'digest': digest,
+            'error': error,
+            'stats': [(use_exceptions, module_stats.as_dict()) 
+                for use_exceptions, module_stats in variant_stats.items()]}
+        self.entries[module_name] = record
+        with open(self.file_name, 'a') as journal_file:
+            journal_file.write(json.dumps(record) + '\n')
@@ -4,13 +4,26 @@
 import argparse
 import ast
 import glob
+import io
 import logging
+import math
 import os
 import sys
 
-from PyGenii import modulevisitor, stats
+from PyGenii import checkpoint, modulevisitor, sampling, spanindex, stats
 
             
+def variant_spec(text):
+    """Convert a [x]THRESHOLD argument into a (exceptions, threshold) pair"""
+    use_exceptions = text.startswith('x')
+    try:
+        threshold = int(text[1:] if use_exceptions else text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid variant %r, expected [x]THRESHOLD" % text)
+    return use_exceptions, threshold
+    
+    
 def parse_args(argv):
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -20,6 +33,11 @@ def parse_args(argv):
     parser.add_argument('-c', '--complexity', dest='complexity', 
         action='store_true', default=False, 
         help='print complexity details for each file/module')
+    parser.add_argument('-k', '--checkpoint', dest='checkpoint', 
+        default=None, 
+        help='append completed module results to CHECKPOINT journal')
+    parser.add_argument('-l', '--spans', dest='span_file', default=None,
+        help='write a line span index of every result to SPAN_FILE')
     parser.add_argument('-m', '--modulestats', dest='module_stats', 
         action='store_true', default=False,
         help='print, for each module, a descriptive report of complexities')
@@ -28,14 +46,27 @@ def parse_args(argv):
     parser.add_argument('-r', '--recursive', dest='recurs',
         action='store_true', default=False,
         help='process files recursively in a folder')
+    parser.add_argument('--resume', dest='resume', action='store_true',
+        default=False, 
+        help='skip modules already recorded in the checkpoint journal')
+    parser.add_argument('--seed', dest='seed', type=int, default=0,
+        help='random seed used when sampling (default=0)')
+    sample_group = parser.add_mutually_exclusive_group()
+    sample_group.add_argument('--sample', dest='sample', type=float, 
+        default=None, help='estimate totals from a FRACTION of the files')
+    sample_group.add_argument('--sample-files', dest='sample_files', 
+        type=int, default=None, help='estimate totals from N files')
     parser.add_argument('-s', '--summary', dest='summary',
         action='store_true', default=False,
         help='print cumulative summary for each file/module')
     parser.add_argument('-t', '--threshold', dest='threshold', type=int, 
-        default=7, help='threshold of complexity to be ignored (default=7)')
+        default=None, help='threshold of complexity to be ignored (default=7)')
     parser.add_argument('-v', '--verbosity', choices=[0, 1, 2], 
         dest='verbosity', default=0, type=int,
         help='controls how much info is printed on screen')
+    parser.add_argument('-V', '--variant', dest='variants', 
+        action='append', type=variant_spec, default=None,
+        help='report variant as [x]THRESHOLD, e.g. x10 (may be repeated)')
     parser.add_argument('-x', '--exceptions', dest='exceptions', 
         action='store_true', default=False, 
         help='use exception handling code when measuring complexity')
@@ -44,6 +75,32 @@ def parse_args(argv):
     
     args = parser.parse_args(argv)
     
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    
+    # A single run without variants is its own only variant
+    if args.variants is None:
+        if args.threshold is None:
+            args.threshold = 7
+        args.variants = [(args.exceptions, args.threshold)]
+    elif args.exceptions or args.threshold is not None:
+        parser.error("-x and -t cannot be combined with -V, "
+            "use -V x7 instead")
+    else:
+        # Keep the first occurrence of each variant, in the given order
+        args.variants = [variant for i, variant in enumerate(args.variants)
+            if variant not in args.variants[:i]]
+        args.exceptions, args.threshold = args.variants[0]
+    args.split_variants = bool(args.out_file) and len(args.variants) > 1
+    
+    args.sampling = args.sample is not None or args.sample_files is not None
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error("--sample must be in the interval (0, 1]")
+    if args.sample_files is not None and args.sample_files < 2:
+        parser.error("--sample-files must be at least 2")
+    if args.sampling and (len(args.variants) > 1 or args.span_file):
+        parser.error("sampling supports neither several variants nor spans")
+    
     if (args.allItems):
         args.complexity = True
         args.summary = True
@@ -90,6 +147,12 @@ def get_module_list(args):
     
 def parse_module(source_file, module_name, module_stats, args):
     """Parse given module and return stats"""
+    parse_module_variants(source_file, module_name, 
+        {args.exceptions: module_stats})
+    
+    
+def parse_module_variants(source_file, module_name, variant_stats):
+    """Parse given module once and fill stats for each exception setting"""
     parse_tree = ast.parse(source_file.read(), module_name)
     
     short_name = os.path.basename(module_name).replace(".py", "")
@@ -97,32 +160,48 @@ def parse_module(source_file, module_name, module_stats, args):
     if short_name.startswith("__"):
         return
     
-    mod_visitor = modulevisitor.ModuleVisitor(args.exceptions)
+    mod_visitor = modulevisitor.ModuleVisitor(False)
     mod_visitor.visit(parse_tree)
+    
+    for use_exceptions, module_stats in variant_stats.items():
+        collect_module_stats(mod_visitor, use_exceptions, short_name, 
+            module_name, module_stats)
+        
+        
+def collect_module_stats(mod_visitor, use_exceptions, short_name, 
+        module_name, module_stats):
+    """Fill stats from a visited module for one exception setting"""
+    func_stats, class_complexity, module_complexity = mod_visitor.results(
+        use_exceptions)
         
     module_stats.complexity_table.append(('X', short_name, 
-        mod_visitor.module_complexity))
+        module_complexity))
   
     count, total_complexity = module_stats.summary['X']
     module_stats.summary['X'] = (count + 1, total_complexity + 
-        mod_visitor.module_complexity)
+        module_complexity)
         
     module_complexities = []
+    module_spans = []
     
-    for class_name in mod_visitor.stats:
+    for class_name in func_stats:
         if class_name:
             qualified_name = '.'.join([short_name, class_name])
             module_stats.complexity_table.append(('C', qualified_name, 
-                mod_visitor.class_complexity[class_name]))
+                class_complexity[class_name]))
+            first_line, last_line = mod_visitor.class_span[class_name]
+            module_spans.append((first_line, last_line, 'C', qualified_name,
+                class_complexity[class_name]))
            
             count, total_complexity = module_stats.summary['C']
             module_stats.summary['C'] = (count + 1, total_complexity + 
-                mod_visitor.class_complexity[class_name])
+                class_complexity[class_name])
             type_id = 'M'
         else:
             type_id = 'F'
             
-        for func_name, complexity in mod_visitor.stats[class_name]:
+        for (func_name, complexity, first_line, 
+                last_line) in func_stats[class_name]:
             if class_name:
                 qualified_name = '.'.join([short_name, class_name, 
                     func_name])
@@ -130,6 +209,8 @@ def parse_module(source_file, module_name, module_stats, args):
                 qualified_name = '.'.join([short_name, func_name])
             module_stats.complexity_table.append((type_id, qualified_name, 
                 complexity))
+            module_spans.append((first_line, last_line, type_id, 
+                qualified_name, complexity))
            
             count, total_complexity = module_stats.summary[type_id]
             module_stats.summary[type_id] = (count + 1, total_complexity + 
@@ -144,6 +225,91 @@ def parse_module(source_file, module_name, module_stats, args):
             max(module_complexities)))
     else:
         module_stats.module_table.append((short_name, 0, '-', '-', '-', '-'))
+        
+    module_stats.span_table[module_name] = sorted(module_spans)
+        
+        
+def analyze_module(module_name, exception_settings, journal=None):
+    """Return stats per exception setting, reusing checkpointed results"""
+    if journal:
+        variant_stats = journal.lookup(module_name, exception_settings)
+        if variant_stats is not None:
+            logging.info("Module %s restored from checkpoint", module_name)
+            return variant_stats
+    
+    logging.info("Parsing module %s", module_name)
+    variant_stats = dict((use_exceptions, stats.Stats()) 
+        for use_exceptions in exception_settings)
+    try:
+        mtime = os.path.getmtime(module_name)
+        source_file = open(module_name, 'rb')
+        source = source_file.read()
+        source_file.close()
+    except OSError as error:
+        logging.error("Skipping unreadable module %s: %s", module_name, error)
+        return variant_stats
+    
+    # The source is read once, both for parsing and for the journal digest
+    error_text = None
+    try:
+        parse_module_variants(io.BytesIO(source), module_name, variant_stats)
+    except (SyntaxError, ValueError, RecursionError) as error:
+        # A broken module must not stop, or keep stopping, a long scan
+        logging.error("Skipping module %s: %s", module_name, error)
+        error_text = str(error)
+        variant_stats = dict((use_exceptions, stats.Stats()) 
+            for use_exceptions in exception_settings)
+    
+    if journal:
+        journal.record(module_name, mtime, journal.digest(source), 
+            variant_stats, error_text)
+    return variant_stats
+    
+    
+def sample_modules(module_list, args, journal=None):
+    """Estimate repository-wide statistics from a sample of modules"""
+    use_exceptions, threshold = args.variants[0]
+    if args.sample_files is None:
+        sample_size = int(math.ceil(args.sample * len(module_list)))
+    else:
+        sample_size = args.sample_files
+    if sample_size < min(2, len(module_list)):
+        sys.exit("genii: --sample %g selects %d of %d files, at least 2 are "
+            "needed" % (args.sample, sample_size, len(module_list)))
+    sample = sampling.Sample(module_list, sample_size, args.seed, threshold)
+    logging.info("Sampling %d of %d modules", len(sample.order), 
+        len(module_list))
+        
+    analyze = lambda module_name: analyze_module(module_name, 
+        [use_exceptions], journal)[use_exceptions]
+        
+    # Pipe to the right output stream
+    if args.out_file:
+        output_file = open(args.out_file, 'w')
+    else:
+        output_file = sys.stdout
+        
+    sampling.run(sample, analyze, output_file)
+    
+    # Close file, if necessary
+    if args.out_file:
+        output_file.close()
+        
+        
+def print_report(global_stats, args, output_file):
+    """Print every requested table of a report"""
+    # Main result
+    global_stats.filter_and_print_result(args, output_file)
+    
+    # Complexity report        
+    global_stats.print_complexity_report(args, output_file)
+    
+    # Main summary
+    global_stats.print_summary(args, output_file)        
+    
+    # Module stats
+    global_stats.print_module_stats(args, output_file)
+    
        
 def main(argv=None):
     """Main function"""
@@ -163,46 +329,82 @@ def main(argv=None):
     module_list = get_module_list(args)
     logging.debug("module_list %s", module_list)
 
-    # Module parsing
-    global_stats = stats.Stats()
-        
-    for module_name in module_list:
-        logging.info("Parsing module %s", module_name)
-        source_file = open(module_name)
+    # Checkpoint journal
+    journal = None
+    if args.checkpoint:
+        journal = checkpoint.Journal(args.checkpoint)
+        if args.resume:
+            journal.load()
+        else:
+            journal.clear()
+    
+    if args.sampling:
+        sample_modules(module_list, args, journal)
+        logging.info("Finished")
+        return
         
-        parse_module(source_file, module_name, global_stats, args)
+    # Module parsing, in a stable order so resumed runs report identically.
+    # Each file is parsed once, whatever the number of variants.
+    exception_settings = sorted(set(use_exceptions 
+        for use_exceptions, _ in args.variants))
+    variant_stats = dict((use_exceptions, stats.Stats()) 
+        for use_exceptions in exception_settings)
         
-        source_file.close()
+    for module_name in sorted(module_list):
+        module_stats = analyze_module(module_name, exception_settings, 
+            journal)
+        for use_exceptions, global_stats in variant_stats.items():
+            global_stats.merge(module_stats[use_exceptions])
    
-    logging.info("Evaluating complexity table")
-    for row in global_stats.complexity_table:
-        logging.debug("%s", row)
-        
-    logging.info("Evaluating summary table")
-    for key in global_stats.summary:
-        logging.debug("%s %s", key, global_stats.summary[key])
+    for use_exceptions, global_stats in variant_stats.items():
+        logging.info("Evaluating complexity table (exceptions=%s)", 
+            use_exceptions)
+        for row in global_stats.complexity_table:
+            logging.debug("%s", row)
+            
+        logging.info("Evaluating summary table (exceptions=%s)", 
+            use_exceptions)
+        for key in global_stats.summary:
+            logging.debug("%s %s", key, global_stats.summary[key])
             
     # Pipe to the right output stream
-    if args.out_file:
+    if args.out_file and not args.split_variants:
         output_file = open(args.out_file, 'w')
     else:
         output_file = sys.stdout
          
-    # Main result
-    global_stats.filter_and_print_result(args, output_file)
-    
-    # Complexity report        
-    global_stats.print_complexity_report(args, output_file)
-    
-    # Main summary
-    global_stats.print_summary(args, output_file)        
-    
-    # Module stats
-    global_stats.print_module_stats(args, output_file)
+    for use_exceptions, threshold in args.variants:
+        variant_args = argparse.Namespace(**vars(args))
+        variant_args.exceptions = use_exceptions
+        variant_args.threshold = threshold
+        variant_name = ('x' if use_exceptions else '') + str(threshold)
+        
+        if args.split_variants:
+            # One output file per variant, named after the variant
+            root, extension = os.path.splitext(args.out_file)
+            output_file = open('.'.join([root, variant_name]) + extension, 
+                'w')
+        elif len(args.variants) > 1:
+            output_file.write("\nVariant %s: exception handlers %s, "
+                "threshold %d\n" % (variant_name, 
+                "counted" if use_exceptions else "ignored", threshold))
+            
+        print_report(variant_stats[use_exceptions], variant_args, 
+            output_file)
+        
+        if args.split_variants:
+            output_file.close()
     
     # Close file, if necessary
-    if args.out_file:
+    if args.out_file and not args.split_variants:
         output_file.close()
+        
+    # Line span index, for the first requested variant
+    if args.span_file:
+        span_file = open(args.span_file, 'w')
+        spanindex.save(variant_stats[args.variants[0][0]].span_table, 
+            span_file)
+        span_file.close()
     
     logging.info("Finished")
    
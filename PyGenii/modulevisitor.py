@@ -14,10 +14,13 @@ class ModuleVisitor(ast.NodeVisitor):
     class Context:
         """Abstract current status description"""
         def __init__(self):
+            # Dotted paths of the enclosing class and of the enclosing
+            # functions within it, so nested names stay distinct
             self.class_name = None
             self.function_name = None
             self.decision_points = 0
             self.exit_points = 0
+            self.except_points = 0
             self.depth = 0
             
         def increment_decision_points(self, count=1):
@@ -28,6 +31,10 @@ class ModuleVisitor(ast.NodeVisitor):
             """Shorthand for incrementing exit points"""
             self.exit_points = self.exit_points + 1
             
+        def increment_except_points(self):
+            """Shorthand for incrementing exception handlers"""
+            self.except_points = self.except_points + 1
+            
         def increment_depth(self):
             """Shorthand for incrementing depth"""
             self.depth = self.depth + 1
@@ -43,6 +50,8 @@ class ModuleVisitor(ast.NodeVisitor):
         self.stats = {}
         self.module_complexity = 0
         self.class_complexity = {}
+        self.class_span = {}
+        self.except_points = {}
         self.context_stack = []
     
     def visit_Module(self, node):
@@ -52,6 +61,7 @@ class ModuleVisitor(ast.NodeVisitor):
         self.context_stack.append(new_context)
         
         self.stats[None] = []
+        self.except_points[None] = []
         self.class_complexity[None] = 0
         
         ast.NodeVisitor.generic_visit(self, node)
@@ -62,11 +72,17 @@ class ModuleVisitor(ast.NodeVisitor):
         """Deal with class information"""
         logging.debug("Begin Class %s", node.name)
         new_context = ModuleVisitor.Context()
-        new_context.class_name = node.name
+        prev_context = self.context_stack[-1]
+        new_context.class_name = '.'.join(name for name in 
+            [prev_context.class_name, prev_context.function_name, node.name] 
+            if name)
         self.context_stack.append(new_context)
         
         self.stats[new_context.class_name] = []
+        self.except_points[new_context.class_name] = []
         self.class_complexity[new_context.class_name] = 0
+        self.class_span[new_context.class_name] = (node.lineno, 
+            node.end_lineno)
         
         ast.NodeVisitor.generic_visit(self, node)
         
@@ -117,7 +133,8 @@ class ModuleVisitor(ast.NodeVisitor):
         logging.debug("FUNC dump: %s", ast.dump(node))
         new_context = ModuleVisitor.Context()
         prev_context = self.context_stack[-1]
-        new_context.function_name = node.name
+        new_context.function_name = '.'.join(name for name in 
+            [prev_context.function_name, node.name] if name)
         new_context.class_name = prev_context.class_name
         new_context.decision_points = 0
         new_context.exit_points = 0
@@ -143,7 +160,9 @@ class ModuleVisitor(ast.NodeVisitor):
             new_context.exit_points = new_context.exit_points + 1        
         complexity = new_context.decision_points - new_context.exit_points + 2
         self.stats[new_context.class_name].append((new_context.function_name,
-            complexity))
+            complexity, node.lineno, node.end_lineno))
+        self.except_points[new_context.class_name].append(
+            new_context.except_points)
         self.class_complexity[new_context.class_name] = (
             self.class_complexity[new_context.class_name] + complexity)
         self.module_complexity = self.module_complexity + complexity
@@ -173,7 +192,27 @@ class ModuleVisitor(ast.NodeVisitor):
     def visit_ExceptHandler(self, node):
         """Visit a Exception Handler node"""
         current_context = self.context_stack[-1]
+        current_context.increment_except_points()
         if self.use_exceptions:
             current_context.increment_decision_points()
             
         ast.NodeVisitor.generic_visit(self, node)
+        
+    def results(self, use_exceptions):
+        """Return stats, class and module complexities for either setting
+        
+        Exception handlers are tracked apart from other decision points, so
+        a single traversal answers both with and without them.
+        """
+        sign = int(use_exceptions) - int(self.use_exceptions)
+        stats = {}
+        class_complexity = {}
+        for class_name in self.stats:
+            stats[class_name] = [(func_name, complexity + sign * except_points,
+                first_line, last_line) for (func_name, complexity, first_line, 
+                last_line), except_points in zip(self.stats[class_name], 
+                self.except_points[class_name])]
+            class_complexity[class_name] = sum(row[1] 
+                for row in stats[class_name])
+        module_complexity = sum(class_complexity.values())
+        return stats, class_complexity, module_complexity
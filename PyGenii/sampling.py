@@ -0,0 +1,212 @@
+"""Approximate repository-wide statistics from a random sample of modules"""
+
+
+import logging
+import math
+import os
+import random
+import sys
+
+from PyGenii import stats
+
+
+# Normal quantile for two sided 95% confidence intervals
+Z_95 = 1.96
+
+# Number of file size strata the modules are split into
+NUM_STRATA = 4
+
+# Order of the values observed for each sampled module
+TYPE_IDS = ['X', 'C', 'M', 'F']
+
+
+class Sample:
+    """Seeded, size stratified sample of modules and its running estimates
+
+    Modules are sorted by size and split into strata of equal count, and
+    each stratum is sampled in proportion to its size (at least two files,
+    so its variance can be estimated, using fewer strata for small
+    samples). Totals use the stratified estimator
+    and the share of functions over threshold a ratio estimator.
+    """
+    def __init__(self, module_list, sample_size, seed, threshold):
+        self.threshold = threshold
+        self.seed = seed
+        modules = sorted(module_list,
+            key=lambda module_name: (os.path.getsize(module_name),
+            module_name))
+        num_modules = len(modules)
+        sample_size = min(sample_size, num_modules)
+        if sample_size < min(2, num_modules):
+            raise ValueError("at least 2 files must be sampled")
+        # Fewer strata for small samples, so each can get two files
+        num_strata = min(NUM_STRATA, num_modules, max(1, sample_size // 2))
+        self.strata = [modules[i * num_modules // num_strata:
+            (i + 1) * num_modules // num_strata] for i in range(num_strata)]
+        self.observations = [[] for _ in self.strata]
+
+        generator = random.Random(seed)
+        draws = []
+        for stratum_id, (stratum, allocation) in enumerate(zip(self.strata,
+                self.allocate(sample_size))):
+            chosen = generator.sample(stratum, allocation)
+            # Spread every stratum along the sequence, so that partial
+            # samples stay close to a proportional allocation
+            draws.extend(((position + 0.5) / len(chosen), stratum_id,
+                module_name) for position, module_name in enumerate(chosen))
+        self.order = [(stratum_id, module_name)
+            for _, stratum_id, module_name in sorted(draws)]
+        logging.debug("sample order %s", self.order)
+
+    def allocate(self, sample_size):
+        """Split sample_size among the strata, adding up exactly
+        
+        Each stratum first gets two files (or all of them, if fewer), and
+        the rest is shared in proportion to the files left in each stratum
+        with the largest remainder method.
+        """
+        allocation = [min(2, len(stratum)) for stratum in self.strata]
+        left = [len(stratum) - count 
+            for stratum, count in zip(self.strata, allocation)]
+        remaining = sample_size - sum(allocation)
+        if remaining > 0:
+            quotas = [remaining * size / sum(left) for size in left]
+            allocation = [count + int(quota) 
+                for count, quota in zip(allocation, quotas)]
+            by_remainder = sorted(range(len(quotas)), 
+                key=lambda i: int(quotas[i]) - quotas[i])
+            for i in by_remainder[:sample_size - sum(allocation)]:
+                allocation[i] = allocation[i] + 1
+        return allocation
+
+    def num_modules(self):
+        """Number of modules in the population"""
+        return sum(len(stratum) for stratum in self.strata)
+
+    def num_sampled(self):
+        """Number of modules observed so far"""
+        return sum(len(values) for values in self.observations)
+
+    def add(self, stratum_id, module_stats):
+        """Record the stats of one analyzed module of a stratum"""
+        counts = [module_stats.summary[type_id][0] for type_id in TYPE_IDS]
+        complexities = [module_stats.summary[type_id][1]
+            for type_id in TYPE_IDS]
+        critical = len([row for row in module_stats.complexity_table
+            if row[2] > self.threshold and row[0] in "FM"])
+        self.observations[stratum_id].append(counts + complexities +
+            [critical])
+
+    def is_ready(self):
+        """Tell if every stratum has enough data for a variance estimate"""
+        for stratum, values in zip(self.strata, self.observations):
+            if len(values) < min(2, len(stratum)):
+                return False
+        return True
+
+    def estimate_total(self, value):
+        """Return estimated total and its variance for one observed value"""
+        total = 0.0
+        variance = 0.0
+        for stratum, values in zip(self.strata, self.observations):
+            size, num_values = len(stratum), len(values)
+            mean = sum(value(row) for row in values) / num_values
+            total = total + size * mean
+            if num_values > 1:
+                spread = (sum((value(row) - mean) ** 2 for row in values) /
+                    (num_values - 1))
+                variance = variance + (size ** 2 * (1 - num_values / size) *
+                    spread / num_values)
+        return total, variance
+
+    def estimate(self, type_id):
+        """Return (count, error, complexity, error) estimates for a type"""
+        column = TYPE_IDS.index(type_id)
+        count, count_variance = self.estimate_total(lambda row: row[column])
+        complexity, complexity_variance = self.estimate_total(
+            lambda row: row[column + len(TYPE_IDS)])
+        return (count, Z_95 * math.sqrt(count_variance), complexity,
+            Z_95 * math.sqrt(complexity_variance))
+
+    def estimate_share(self):
+        """Return the share of functions over threshold and its error"""
+        functions = lambda row: row[TYPE_IDS.index('M')] + row[
+            TYPE_IDS.index('F')]
+        num_functions, _ = self.estimate_total(functions)
+        if num_functions == 0:
+            return None
+        num_critical, _ = self.estimate_total(lambda row: row[-1])
+        share = num_critical / num_functions
+        # Linearized variance of the ratio estimator
+        _, variance = self.estimate_total(
+            lambda row: row[-1] - share * functions(row))
+        return share, Z_95 * math.sqrt(variance) / num_functions
+
+    def print_progress(self, output_file):
+        """Print a one line summary of the current estimates"""
+        output_file.write("Analyzed %d/%d sampled files of %d:" % (
+            self.num_sampled(), len(self.order), self.num_modules()))
+        if self.is_ready():
+            count, count_error = self.estimate('F')[:2]
+            methods, methods_error = self.estimate('M')[:2]
+            output_file.write(" functions %d +/- %d, methods %d +/- %d" % (
+                round(count), round(count_error), round(methods),
+                round(methods_error)))
+            share = self.estimate_share()
+            if share is not None:
+                output_file.write(", over threshold %.1f%% +/- %.1f%%" % (
+                    100 * share[0], 100 * share[1]))
+        output_file.write('\n')
+        output_file.flush()
+
+    def print_estimates(self, output_file):
+        """Print the estimated summary table"""
+        if self.num_modules() == 0:
+            output_file.write("\nNo python files to parse!\n")
+            return
+        output_file.write("\nEstimated cumulative statistics "
+            "(%d of %d files, seed %s, 95%% confidence)\n" % (
+            self.num_sampled(), self.num_modules(), self.seed))
+        if not self.is_ready():
+            output_file.write("Not enough files sampled to estimate!\n")
+            return
+        table = []
+        for type_id in TYPE_IDS:
+            table.append((type_id,) + tuple(int(round(value))
+                for value in self.estimate(type_id)))
+        display_format = {}
+        display_format['header'] = ["Type", "Count", "+/-", "Complexity",
+            "+/-"]
+        display_format['col_align'] = ['^', '>', '>', '>', '>']
+        display_format['pad_left'] = [1, 1, 1, 1, 1]
+        display_format['pad_right'] = [1, 1, 1, 1, 1]
+        stats.Stats.pretty_print(table, display_format, output_file)
+
+        share = self.estimate_share()
+        if share is not None:
+            output_file.write("Functions over threshold %d: %.1f%% +/- "
+                "%.1f%%\n" % (self.threshold, 100 * share[0],
+                100 * share[1]))
+
+
+def run(sample, analyze, output_file, progress_file=None,
+        report_every=None):
+    """Analyze the sampled modules, streaming estimates as they improve
+
+    analyze is called with a module name and returns its Stats. Progress
+    lines go to progress_file, and the run may be stopped with Ctrl-C: the
+    final table then reports the estimates so far.
+    """
+    if progress_file is None:
+        progress_file = sys.stderr
+    if report_every is None:
+        report_every = max(1, len(sample.order) // 20)
+    try:
+        for position, (stratum_id, module_name) in enumerate(sample.order,
+                1):
+            sample.add(stratum_id, analyze(module_name))
+            if position % report_every == 0 or position == len(sample.order):
+                sample.print_progress(progress_file)
+    except KeyboardInterrupt:
+        logging.warning("Sampling interrupted, reporting partial estimates")
+    sample.print_estimates(output_file)
@@ -0,0 +1,63 @@
+"""Interval index mapping source lines to function and class results"""
+
+
+import json
+
+
+class SpanIndex:
+    """Answer which results of a module overlap a range of lines
+    
+    Rows are (first_line, last_line, type_id, name, complexity) tuples, kept
+    sorted by first line. They form an implicit balanced tree where each
+    midpoint stores the largest last line of its subtree, so a query costs
+    O(log n + k) for k matching rows.
+    """
+    def __init__(self, rows):
+        self.rows = sorted(tuple(row) for row in rows)
+        self.max_last = [0] * len(self.rows)
+        self.build(0, len(self.rows))
+        
+    def build(self, low, high):
+        """Fill max_last for the subtree over rows[low:high]"""
+        if low >= high:
+            return 0
+        mid = (low + high) // 2
+        self.max_last[mid] = max(self.rows[mid][1], self.build(low, mid),
+            self.build(mid + 1, high))
+        return self.max_last[mid]
+        
+    def overlapping(self, first_line, last_line):
+        """Return the rows whose span intersects [first_line, last_line]"""
+        result = []
+        self.search(0, len(self.rows), first_line, last_line, result)
+        return result
+        
+    def at(self, line):
+        """Return the rows whose span contains line, in source order"""
+        return self.overlapping(line, line)
+        
+    def search(self, low, high, first_line, last_line, result):
+        """Collect matching rows of the subtree over rows[low:high]"""
+        if low >= high:
+            return
+        mid = (low + high) // 2
+        if self.max_last[mid] < first_line:
+            return
+        self.search(low, mid, first_line, last_line, result)
+        row = self.rows[mid]
+        if row[0] > last_line:
+            return
+        if row[1] >= first_line:
+            result.append(row)
+        self.search(mid + 1, high, first_line, last_line, result)
+        
+        
+def save(span_table, output_file):
+    """Write the span table of a Stats object as JSON"""
+    json.dump(span_table, output_file, sort_keys=True)
+    
+    
+def load(input_file):
+    """Read a span table written by save and index each module"""
+    return dict((module_name, SpanIndex(rows)) 
+        for module_name, rows in json.load(input_file).items())
@@ -13,6 +13,37 @@ class Stats:
         self.complexity_table = []
         self.summary = {'X':(0, 0), 'C':(0, 0), 'M':(0, 0), 'F':(0, 0)}
         self.module_table = []
+        self.span_table = {}
+        
+    def merge(self, other):
+        """Accumulate the results of another Stats object into this one"""
+        self.complexity_table.extend(other.complexity_table)
+        for type_id, (count, complexity) in other.summary.items():
+            total_count, total_complexity = self.summary[type_id]
+            self.summary[type_id] = (total_count + count, 
+                total_complexity + complexity)
+        self.module_table.extend(other.module_table)
+        self.span_table.update(other.span_table)
+        
+    def as_dict(self):
+        """Return a JSON serializable representation of the stats"""
+        return {'complexity_table': self.complexity_table,
+            'summary': self.summary,
+            'module_table': self.module_table,
+            'span_table': self.span_table}
+            
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a Stats object from the output of as_dict"""
+        new_stats = cls()
+        new_stats.complexity_table = [tuple(row) 
+            for row in data['complexity_table']]
+        new_stats.summary = dict((type_id, tuple(value)) 
+            for type_id, value in data['summary'].items())
+        new_stats.module_table = [tuple(row) for row in data['module_table']]
+        new_stats.span_table = dict((module_name, [tuple(row) for row in rows])
+            for module_name, rows in data.get('span_table', {}).items())
+        return new_stats
     
     @staticmethod
     def pretty_print(table, display_format, output_file=sys.stdout):
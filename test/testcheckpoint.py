@@ -0,0 +1,94 @@
+"""Test checkpointed and resumed runs"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from PyGenii import checkpoint, geniimain
+
+class TestCheckpoint(unittest.TestCase):
+    """Test the checkpoint journal and resumed runs"""
+    
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.journal_name = os.path.join(self.folder, "journal")
+        for name, code in [("a.py", "def f(x):\n    if x:\n        g()\n"),
+                ("b.py", "class C:\n    def m(self):\n        pass\n")]:
+            with open(os.path.join(self.folder, name), 'w') as module_file:
+                module_file.write(code)
+                
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        
+    def run_genii(self, *options):
+        out_name = os.path.join(self.folder, "report.txt")
+        geniimain.main(['-a', '-o', out_name] + list(options) + 
+            [os.path.join(self.folder, "*.py")])
+        with open(out_name) as out_file:
+            return out_file.read()
+            
+    def test_resume_report_is_identical(self):
+        expected = self.run_genii()
+        self.run_genii('-k', self.journal_name)
+        
+        # Simulate a run killed while writing the second record
+        with open(self.journal_name) as journal_file:
+            lines = journal_file.readlines()
+        with open(self.journal_name, 'w') as journal_file:
+            journal_file.write(lines[0] + lines[1][:10])
+        
+        resumed = self.run_genii('-k', self.journal_name, '--resume')
+        
+        self.assertEqual(expected, resumed)
+        
+        # The resumed run appended a record on a line of its own
+        journal = checkpoint.Journal(self.journal_name)
+        journal.load()
+        self.assertEqual(2, len(journal.entries))
+        
+        resumed = self.run_genii('-k', self.journal_name, '--resume')
+        journal.load()
+        
+        self.assertEqual(expected, resumed)
+        self.assertEqual(2, len(journal.entries))
+        with open(self.journal_name) as journal_file:
+            self.assertEqual(2, len(journal_file.readlines()))
+        
+    def test_resume_skips_done_modules(self):
+        self.run_genii('-k', self.journal_name)
+        journal = checkpoint.Journal(self.journal_name)
+        journal.load()
+        module_name = os.path.join(self.folder, "a.py")
+        
+        self.assertIsNotNone(journal.lookup(module_name, [False]))
+        self.assertIsNone(journal.lookup(module_name, [False, True]))
+        
+        with open(module_name, 'a') as module_file:
+            module_file.write("    return 1\n")
+        os.utime(module_name, (0, 0))
+        
+        self.assertIsNone(journal.lookup(module_name, [False]))
+
+    def test_broken_module_is_recorded(self):
+        expected = self.run_genii()
+        broken_name = os.path.join(self.folder, "broken.py")
+        with open(broken_name, 'w') as module_file:
+            module_file.write("def f(:\n")
+        
+        self.assertEqual(expected, self.run_genii('-k', self.journal_name))
+        
+        journal = checkpoint.Journal(self.journal_name)
+        journal.load()
+        
+        self.assertEqual(3, len(journal.entries))
+        self.assertTrue(journal.entries[broken_name]['error'])
+        self.assertEqual(expected, 
+            self.run_genii('-k', self.journal_name, '--resume'))
+        with open(self.journal_name) as journal_file:
+            self.assertEqual(3, len(journal_file.readlines()))
+
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@
 """Test main behaviour of the complexity analyzer"""
 
 
+import contextlib
+import io
 import unittest
 from PyGenii import geniimain
 
@@ -23,6 +25,7 @@ class TestMainParser(unittest.TestCase):
             self.complexity_table = []
             self.summary = {'X':(0, 0), 'C':(0, 0), 'M':(0, 0), 'F':(0, 0)}
             self.module_table = []
+            self.span_table = {}
             
     class MockArgs:
         """Simulate an args object"""
@@ -131,7 +134,8 @@ class A:
         pass
 """
         expected_complexity = [('X', 'test', 2), ('C', 'test.A', 1), 
-            ('M', 'test.A.g', 1), ('C', 'test.B', 1), ('M', 'test.B.f', 1)]
+            ('M', 'test.A.g', 1), ('C', 'test.A.B', 1), 
+            ('M', 'test.A.B.f', 1)]
         expected_summary = {'X':(1, 2), 'C':(2, 2), 'M':(2, 2), 'F':(0, 0)}
         expected_module = [('test', 2, 2, 1, 1, 1)]
         
@@ -153,7 +157,7 @@ def f(x):
         return g(x)
 """
         expected_complexity = [('X', 'test', 2), ('F', 'test.f', 1), 
-            ('F', 'test.g', 1)]
+            ('F', 'test.f.g', 1)]
         expected_summary = {'X':(1, 2), 'C':(0, 0), 'M':(0, 0), 'F':(2, 2)}
         expected_module = [('test', 2, 2, 1, 1, 1)]
 
@@ -206,6 +210,95 @@ def f(x):
         self.assertEqual(expected_summary, self.stats.summary)   
         self.assertEqual(expected_module, self.stats.module_table)
 
+    def test_spans(self):
+        self.module.code = """
+def f(x):
+    def g(y):
+        return y * 2
+    return g(x)
+class C:
+    def get(self):
+        return 1
+"""
+        expected_spans = [(2, 5, 'F', 'test.f', 1), (3, 4, 'F', 'test.f.g', 1), 
+            (6, 8, 'C', 'test.C', 1), (7, 8, 'M', 'test.C.get', 1)]
+        
+        geniimain.parse_module(self.module, "test.py", self.stats, self.args)
+        
+        self.assertEqual({'test.py': expected_spans}, self.stats.span_table)
+        
+    def test_spans_of_same_names(self):
+        self.module.code = """
+class A:
+    def f(self):
+        def g():
+            pass
+    class A:
+        def f(self):
+            pass
+def h():
+    def g():
+        pass
+"""
+        expected_spans = [(2, 8, 'C', 'test.A', 2), (3, 5, 'M', 'test.A.f', 1),
+            (4, 5, 'M', 'test.A.f.g', 1), (6, 8, 'C', 'test.A.A', 1), 
+            (7, 8, 'M', 'test.A.A.f', 1), (9, 11, 'F', 'test.h', 1), 
+            (10, 11, 'F', 'test.h.g', 1)]
+        
+        geniimain.parse_module(self.module, "test.py", self.stats, self.args)
+        
+        self.assertEqual({'test.py': expected_spans}, self.stats.span_table)
+
+    def test_variants(self):
+        self.module.code = """
+def f(x):
+    try:
+        if x:
+            g()
+    except ValueError:
+        pass
+    except KeyError:
+        pass
+"""
+        variant_stats = {False: TestMainParser.MockStats(), 
+            True: TestMainParser.MockStats()}
+        
+        geniimain.parse_module_variants(self.module, "test", variant_stats)
+        
+        for use_exceptions, expected in [(False, 2), (True, 4)]:
+            self.args.exceptions = use_exceptions
+            single_stats = TestMainParser.MockStats()
+            geniimain.parse_module(self.module, "test", single_stats, 
+                self.args)
+            self.assertEqual([('X', 'test', expected), 
+                ('F', 'test.f', expected)], single_stats.complexity_table)
+            self.assertEqual(vars(single_stats), 
+                vars(variant_stats[use_exceptions]))
+                
+    def test_variant_args(self):
+        args = geniimain.parse_args(['-V', '7', '-V', 'x10', 'a.py'])
+        
+        self.assertEqual([(False, 7), (True, 10)], args.variants)
+        self.assertFalse(args.split_variants)
+        
+        args = geniimain.parse_args(['-x', '-t', '5', '-o', 'out.txt', 
+            'a.py'])
+        
+        self.assertEqual([(True, 5)], args.variants)
+        self.assertFalse(args.split_variants)
+        
+        args = geniimain.parse_args(['-V', '7', '-V', 'x7', '-V', '7', 
+            '-o', 'out.txt', 'a.py'])
+        
+        self.assertEqual([(False, 7), (True, 7)], args.variants)
+        self.assertTrue(args.split_variants)
+        
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, geniimain.parse_args, 
+                ['-V', '7', '-t', '10', 'a.py'])
+            self.assertRaises(SystemExit, geniimain.parse_args, 
+                ['-V', '7', '-x', 'a.py'])
+
         
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Test sampled estimates"""
+
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from PyGenii import geniimain, sampling, stats
+
+class TestSampling(unittest.TestCase):
+    """Test the stratified sample and its estimates"""
+    
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.module_list = []
+        for i in range(20):
+            module_name = os.path.join(self.folder, "m%d.py" % i)
+            with open(module_name, 'w') as module_file:
+                for j in range(i % 5 + 1):
+                    module_file.write("def f%d(x):\n" % j + 
+                        "    if x:\n        g()\n" * i + "    pass\n")
+            self.module_list.append(module_name)
+                
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        
+    def analyze(self, module_name):
+        module_stats = stats.Stats()
+        with open(module_name) as source_file:
+            geniimain.parse_module(source_file, module_name, module_stats,
+                geniimain.parse_args([module_name]))
+        return module_stats
+        
+    def run_sample(self, sample_size, seed=0):
+        sample = sampling.Sample(self.module_list, sample_size, seed, 7)
+        output_file = io.StringIO()
+        sampling.run(sample, self.analyze, output_file, io.StringIO())
+        return sample, output_file.getvalue()
+        
+    def test_census_is_exact(self):
+        sample, _ = self.run_sample(len(self.module_list))
+        global_stats = stats.Stats()
+        for module_name in self.module_list:
+            global_stats.merge(self.analyze(module_name))
+        
+        for type_id in sampling.TYPE_IDS:
+            count, count_error, complexity, complexity_error = (
+                sample.estimate(type_id))
+            self.assertEqual(global_stats.summary[type_id], 
+                (count, complexity))
+            self.assertEqual((0, 0), (count_error, complexity_error))
+            
+    def test_seeded_sample(self):
+        sample, output = self.run_sample(8, seed=1)
+        
+        self.assertEqual(8, len(sample.order))
+        self.assertEqual([2, 2, 2, 2], [len(values) 
+            for values in sample.observations])
+        self.assertEqual(output, self.run_sample(8, seed=1)[1])
+        self.assertIn("Functions over threshold 7", output)
+
+    def test_sample_size(self):
+        for sample_size in [2, 3, 5, 7, 10, 14, 19, 20, 30]:
+            sample = sampling.Sample(self.module_list, sample_size, 0, 7)
+            
+            self.assertEqual(min(sample_size, 20), len(sample.order))
+            self.assertEqual(len(self.module_list), len(set(
+                module_name for stratum in sample.strata 
+                for module_name in stratum)))
+            
+        sample = sampling.Sample(self.module_list, 10, 0, 7)
+        
+        self.assertEqual([3, 3, 2, 2], sample.allocate(10))
+        self.assertEqual(2, len(sampling.Sample(self.module_list, 5, 0, 
+            7).strata))
+        self.assertRaises(ValueError, sampling.Sample, self.module_list, 1, 
+            0, 7)
+            
+    def test_small_fraction(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, geniimain.main, 
+                ['--sample', '0.0001'] + self.module_list)
+
+        
+if __name__ == "__main__":
+    unittest.main()
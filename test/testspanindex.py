@@ -0,0 +1,44 @@
+"""Test line span lookups"""
+
+
+import io
+import unittest
+from PyGenii import spanindex
+
+class TestSpanIndex(unittest.TestCase):
+    """Test overlap queries on the interval index"""
+    
+    
+    def setUp(self):
+        self.rows = [(2, 40, 'C', 'mod.A', 5), (3, 10, 'M', 'mod.A.f', 2),
+            (12, 38, 'M', 'mod.A.g', 3), (20, 25, 'F', 'mod.h', 1),
+            (50, 60, 'F', 'mod.k', 4)]
+        self.index = spanindex.SpanIndex(self.rows)
+        
+    def brute_force(self, first_line, last_line):
+        return sorted(row for row in self.rows 
+            if row[0] <= last_line and row[1] >= first_line)
+        
+    def test_at(self):
+        self.assertEqual([self.rows[0], self.rows[2], self.rows[3]], 
+            self.index.at(22))
+        self.assertEqual([], self.index.at(45))
+        
+    def test_overlapping(self):
+        for first_line in range(0, 65):
+            for last_line in range(first_line, 65):
+                self.assertEqual(self.brute_force(first_line, last_line),
+                    self.index.overlapping(first_line, last_line))
+                    
+    def test_save_and_load(self):
+        buffer = io.StringIO()
+        spanindex.save({'mod.py': self.rows}, buffer)
+        buffer.seek(0)
+        
+        indexes = spanindex.load(buffer)
+        
+        self.assertEqual(self.rows[4:], indexes['mod.py'].overlapping(45, 70))
+
+        
+if __name__ == "__main__":
+    unittest.main()
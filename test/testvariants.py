@@ -0,0 +1,60 @@
+"""Test reports with several variants"""
+
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from PyGenii import geniimain
+
+class TestVariants(unittest.TestCase):
+    """Test the output layouts of a multi-variant run"""
+    
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.module_name = os.path.join(self.folder, "v.py")
+        with open(self.module_name, 'w') as module_file:
+            module_file.write("def f(x):\n    try:\n        if x:\n"
+                "            g()\n    except ValueError:\n        pass\n")
+                
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        
+    def single_report(self, *options):
+        output_file = io.StringIO()
+        with contextlib.redirect_stdout(output_file):
+            geniimain.main(['-s'] + list(options) + [self.module_name])
+        return output_file.getvalue()
+        
+    def test_sections(self):
+        output_file = io.StringIO()
+        with contextlib.redirect_stdout(output_file):
+            geniimain.main(['-s', '-V', '1', '-V', 'x2', '-V', '1', 
+                self.module_name])
+        
+        expected = ("\nVariant 1: exception handlers ignored, threshold 1\n" +
+            self.single_report('-t', '1') + 
+            "\nVariant x2: exception handlers counted, threshold 2\n" +
+            self.single_report('-x', '-t', '2'))
+        
+        self.assertEqual(expected, output_file.getvalue())
+        
+    def test_files(self):
+        out_name = os.path.join(self.folder, "report.txt")
+        geniimain.main(['-s', '-o', out_name, '-V', '1', '-V', 'x2', 
+            self.module_name])
+        
+        self.assertFalse(os.path.exists(out_name))
+        for variant_name, options in [("1", ['-t', '1']), 
+                ("x2", ['-x', '-t', '2'])]:
+            with open(os.path.join(self.folder, 
+                    "report.%s.txt" % variant_name)) as out_file:
+                self.assertEqual(self.single_report(*options), 
+                    out_file.read())
+
+        
+if __name__ == "__main__":
+    unittest.main()